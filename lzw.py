@@ -5,156 +5,226 @@ required by the LZW decoder.
 
 LZW provides the means to decode an iterable of 12-bit LZW codewords.
 
-CodewordTable is the symbol table used to store a mapping of LZW codewords to strings.
+CodewordTable is the symbol table used to store a mapping of LZW codewords to byte strings.
+
+decode and decode_file decode the contents of an LZW file, held in memory or on disk,
+in a single call.
 
 """
 
+import array
+import mmap
 import os
-import io
-import collections
+import sys
 
+_HIGH_NIBBLE = bytes(x >> 4 for x in range(256))
+_LOW_NIBBLE = bytes(x & 0x0F for x in range(256))
+_LOW_NIBBLE_UP = bytes((x & 0x0F) << 4 for x in range(256))
 
-class Binary12BitInput:
-    """Provides an interface to the lzw file."""
+# Offsets of the high and low byte within a native byte order 16-bit word.
+_HIGH_BYTE, _LOW_BYTE = (0, 1) if sys.byteorder == "big" else (1, 0)
 
-    def __init__(self, filename: str):
-        self._filename = filename
+# Number of packed bytes (a whole number of 3 byte groups) unpacked in one go.
+_UNPACK_BLOCK_SIZE = 3 * 16384
 
-        nbits = os.stat(self._filename).st_size * 8
-        self.file = open(self._filename, "rb")
-        self.buffer = collections.deque()
+# The 256 single byte entries every codeword table starts with.
+_INITIAL_TABLE = [bytes((x,)) for x in range(256)]
 
-        self.has_16bit_element = nbits % 12 != 0 and nbits >= 16
-        self.n_12bits = nbits // 12
 
-        self.i = 0
-        self.n = 1
-        self.previous_byte = 0
-        self._finished = False
+def _unpack(data: bytes) -> array.array:
+    """Unpack every 12-bit codeword in data, which may be any bytes-like object.
 
-        # current bytes to translate into a 12-bit codeword
-        self.current_bytes = [x
-                              for x in self.file.read(2)]
+    The 3 byte groups are unpacked one block at a time, so the intermediate
+    buffers for a block stay in cache instead of streaming the whole file
+    through memory once per step.
+    """
+    with memoryview(data) as view, view.cast("B") as view:
+        end = len(view) // 3 * 3
 
-    def __iter__(self):
-        return self
+        codewords = array.array("H")
+        for i in range(0, end, _UNPACK_BLOCK_SIZE):
+            _unpack_block(bytes(view[i:min(i + _UNPACK_BLOCK_SIZE, end)]), codewords)
 
-    def _get_next_byte(self):
-        """Return the next byte from the internal buffer."""
-        if not self.buffer:
-            self.buffer = collections.deque(self.file.read(io.DEFAULT_BUFFER_SIZE))
+        if len(view) - end == 2:
+            # The last 12-bit can be padded to 16-bits make the last element byte aligned.
+            codewords.append(view[-2] << 8 | view[-1])
 
-        return self.buffer.popleft()
+    return codewords
 
-    def __next__(self):
-        """Get the next available codeword from the file."""
-        if self._finished:
-            self.file.close()
-            raise StopIteration
 
-        c12bit_codeword = 0
-        if self.n < self.n_12bits:
+def _unpack_block(block: bytes, codewords: array.array):
+    """Unpack a block of whole 3 byte groups onto the end of codewords.
 
-            if self.n & 1 == 1:
-                # From 0xAB 0xC? ..
-                # Move 0xAB up by 4 to make space for C.
-                top_4bits = self.current_bytes[0] << 4
-                lower_8bits = (self.current_bytes[1] & 0xF0) >> 4
+    Each group of 3 bytes 0xAB 0xCD 0xEF holds the two codewords 0xABC and 0xDEF.
+    The bytes are split into three strided slices, the nibbles are moved
+    with translation tables and merged as big integers, and the resulting
+    high/low bytes are interleaved into a 16-bit buffer,
+    so no Python code runs per codeword.
+    """
+    n_groups = len(block) // 3
+    b0 = block[0::3]
+    b1 = block[1::3]
+    b2 = block[2::3]
 
-                c12bit_codeword = top_4bits | lower_8bits
+    # 0xAB 0xCD -> 0x0A 0xBC
+    even_low = (int.from_bytes(b0.translate(_LOW_NIBBLE_UP), "big")
+                | int.from_bytes(b1.translate(_HIGH_NIBBLE), "big"))
 
-                self.current_bytes[0] = self.current_bytes[1]
-                self.current_bytes[1] = self._get_next_byte()
+    # Lay the high/low bytes of each 16-bit codeword out in native byte order,
+    # so the buffer can be loaded into the array without swapping.
+    words = bytearray(4 * n_groups)
+    words[_HIGH_BYTE::4] = b0.translate(_HIGH_NIBBLE)
+    words[_LOW_BYTE::4] = even_low.to_bytes(n_groups, "big")
+    # 0xCD 0xEF -> 0x0D 0xEF
+    words[2 + _HIGH_BYTE::4] = b1.translate(_LOW_NIBBLE)
+    words[2 + _LOW_BYTE::4] = b2
 
-            else:
-                # From 0x?A 0xBC
-                # Move A into the top 4 bits and pad
-                # in 0xBC in the bottom 8 bits.
-                top_4bits = (self.current_bytes[0] & 0x0F) << 8
-                lower_8bits = self.current_bytes[1]
-                c12bit_codeword = top_4bits | lower_8bits
+    codewords.frombytes(words)
 
-                self.current_bytes = [self._get_next_byte(), self._get_next_byte()]
 
-            self.n += 1
+class Binary12BitInput:
+    """Provides an interface to the lzw file."""
 
-        elif self.has_16bit_element:
-            # The last 12-bit can be padded to 16-bits make the last element byte aligned.
-            c12bit_codeword = self.current_bytes[0] << 8 | self.current_bytes[1]
-            self._finished = True
+    def __init__(self, filename: str):
+        self._filename = filename
 
-        else:
-            self._finished = True
+        with open(self._filename, "rb", buffering=0) as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                # An empty file cannot be mapped.
+                self._codewords = array.array("H")
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        data.madvise(mmap.MADV_SEQUENTIAL)
+
+                    self._codewords = _unpack(data)
+
+    def __iter__(self):
+        return iter(self._codewords)
 
-        return c12bit_codeword
+    def codewords(self) -> array.array:
+        """Return every codeword as an array of unsigned 16-bit integers."""
+        return self._codewords
 
 
 class CodewordTable:
-    """Table which maps codewords to strings.
+    """Table which maps codewords to byte strings.
     """
     def __init__(self, size: int):
         self._size = size
-        self._table = []
+        # All entries are allocated up front; the 256 initial entries are never
+        # overwritten, so the table only holds codewords below the cursor.
+        self._table = _INITIAL_TABLE + [b""] * (size - 256)
+        self._cursor = 0
         self._reset()
 
     def _reset(self):
-        self._table = [chr(x)
-                       for x in range(256)]
+        self._cursor = 256
 
-    def put(self, string: str):
-        if len(self._table) >= self._size:
+    def put(self, string: bytes):
+        if self._cursor >= self._size:
             self._reset()
 
-        self._table.append(string)
+        self._table[self._cursor] = string
+        self._cursor += 1
+
+    def __len__(self) -> int:
+        return self._cursor
+
+    def get(self, codeword: int) -> bytes:
+        if not 0 <= codeword < self._cursor:
+            raise IndexError(f"codeword {codeword:#x} is not in the table")
 
-    def get(self, codeword: int) -> str:
         return self._table[codeword]
 
 
 class LZW:
 
     def __init__(self, codewords, table_size=4096):
-        """:param codewords : An iterable containing the codewords to decode.
+        """:param codewords : An iterable containing the codewords to decode,
+                              e.g. the array from Binary12BitInput.codewords().
            :param table_size : Size of the symbol table.
         """
         self._codewords = iter(codewords)
         self._table_size = table_size
 
     def expand(self):
-        """Generator which yields a single decoded string at a time.
+        """Generator which yields a single decoded byte string at a time.
         """
         table = CodewordTable(self._table_size)
+        # Bind everything used per codeword to locals once.
+        get = table.get
+        put = table.put
+        codewords = self._codewords
+
+        cw0 = next(codewords, None)
+        if cw0 is None:
+            return
 
-        cw0 = next(self._codewords)
-        string = table.get(cw0)
+        string = get(cw0)
         yield string
 
-        for cw1 in self._codewords:
-            try:
-                ch1 = table.get(cw1)
-                table_entry = string + ch1[0]
-                table.put(table_entry)
+        for cw1 in codewords:
+            if cw1 < len(table):
+                ch1 = get(cw1)
+                table_entry = string + ch1[:1]
+                put(table_entry)
 
                 string = ch1
 
-            except IndexError:
-                table_entry = string + string[0]
-                table.put(table_entry)
+            else:
+                table_entry = string + string[:1]
+                put(table_entry)
 
                 string = table_entry
 
             yield string
 
+    def decode(self) -> bytes:
+        """Decode every codeword into a single bytes object."""
+        return b"".join(self.expand_bytes())
+
+    def expand_bytes(self, chunk: int = 1 << 16):
+        """Generator which yields the decoded output in blocks of at least chunk bytes.
+        """
+        out = bytearray()
+        for string in self.expand():
+            out += string
+            if len(out) >= chunk:
+                yield bytes(out)
+                out.clear()
+
+        if out:
+            yield bytes(out)
+
+
+def decode(data: bytes, table_size: int = 4096) -> bytes:
+    """Decode an LZW file already held in memory, from its raw 12-bit packed bytes.
+
+    :param data : The contents of an LZW file, as bytes or any other bytes-like object.
+    :param table_size : Size of the symbol table.
+    """
+    return LZW(_unpack(data), table_size=table_size).decode()
+
+
+def decode_file(filename: str, table_size: int = 4096) -> bytes:
+    """Decode an LZW file in a single call.
+
+    :param filename : Path of the LZW file.
+    :param table_size : Size of the symbol table.
+    """
+    return LZW(Binary12BitInput(filename).codewords(), table_size=table_size).decode()
+
 
 if __name__ == '__main__':
     """Run an example provided from the command line."""
-    import sys
     try:
         name = sys.argv[1]
-        lzw = LZW(Binary12BitInput(name))
-
-        for c in lzw.expand():
-            print(c, end="")
-
     except IndexError:
         print("Please provide an LZW filename as the first argument.")
+    else:
+        lzw = LZW(Binary12BitInput(name).codewords())
+
+        # Write the decoded output in 64 KiB blocks rather than one print per string.
+        for block in lzw.expand_bytes():
+            sys.stdout.buffer.write(block)
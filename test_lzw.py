@@ -1,17 +1,63 @@
 from unittest import TestCase
-from lzw import LZW, Binary12BitInput
+import lzw
+from lzw import LZW, Binary12BitInput, decode, decode_file
 import pathlib
 import os
-import io
+import random
+import string
+import tempfile
 
 
 def to_string(lz: LZW):
     """Helper function used to expand a LZW into a string"""
-    sio = io.StringIO()
-    for c in lz.expand():
-        sio.write(c)
+    return b"".join(lz.expand()).decode("latin-1")
 
-    return sio.getvalue()
+
+def encode(data: bytes, table_size=4096):
+    """Helper function used to LZW encode data.
+
+    Like the decoder, the entry for a codeword is only put once the next codeword
+    is known, and the table is reset when an entry is put into a full table.
+    """
+    initial = {bytes((x,)): x for x in range(256)}
+    table = dict(initial)
+    next_code = 256
+    codewords = []
+    previous = None
+
+    def emit(string):
+        nonlocal table, next_code, previous
+        codewords.append(table[string])
+        if previous is not None:
+            if next_code >= table_size:
+                table = dict(initial)
+                next_code = 256
+
+            table[previous + string[:1]] = next_code
+            next_code += 1
+
+        previous = string
+
+    string = b""
+    for x in data:
+        c = bytes((x,))
+        if string + c in table:
+            string += c
+        else:
+            emit(string)
+            string = c
+
+    emit(string)
+    return codewords
+
+
+def words(n: int) -> bytes:
+    """Helper function used to generate n words of text which compress well."""
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 8)))
+                  for _ in range(500)]
+
+    return " ".join(rng.choice(vocabulary) for _ in range(n)).encode()
 
 
 class LZWTest(TestCase):
@@ -87,11 +133,61 @@ class LZWTest(TestCase):
 
         self.assertEqual("ABCABCABCABCABC", to_string(lzw))
 
+    def test_lzw_decode(self):
+        """LZWTest decoding straight to bytes, whole and in blocks, matches the
+        expanded strings, including the corner case and resetting the table.
+        """
+        cases = [([0x41, 0x100, 0x101, 0x102, 0x103], 4096),
+                 ([0x41, 0x42, 0x43, 0x100, 0x102,
+                   0x42, 0x43, 0x41, 0x42, 0x43, 0x41, 0x100], 260),
+                 (list(Binary12BitInput(r"examples/compressedfile3.z")), 4096)]
+
+        for codewords, table_size in cases:
+            expected = to_string(LZW(codewords, table_size=table_size))
+            decoded = LZW(codewords, table_size=table_size).decode()
+            self.assertEqual(expected, decoded.decode("latin-1"))
+
+            blocks = list(LZW(codewords, table_size=table_size).expand_bytes(chunk=7))
+            self.assertTrue(all(len(block) >= 7 for block in blocks[:-1]))
+            self.assertEqual(decoded, b"".join(blocks))
+
+    def test_lzw_wraparound(self):
+        """LZWTest decoding a stream long enough for the table to be reset several times.
+
+        Entries put after a reset must not depend on codewords from before it.
+        """
+        data = words(10000)
+        codewords = encode(data)
+        self.assertGreater(len(codewords), 3 * 4096)
+
+        self.assertEqual(data.decode("latin-1"), to_string(LZW(codewords)))
+        self.assertEqual(data, LZW(codewords).decode())
+        self.assertEqual(data, b"".join(LZW(codewords).expand_bytes(chunk=4096)))
+
+    def test_lzw_wraparound_stale(self):
+        """LZWTest codewords whose entries were put across a reset of the table."""
+        lzw = LZW([0x41] + [0x42] * 3840 + [0x101, 0x41, 0x101])
+        self.assertEqual("A" + "B" * 3840 + "BBABBA", to_string(lzw))
+
+        lzw = LZW([0x41] + [0x42] * 3840 + [0x12C, 0x41] + [0x43] * 50 + [0x101])
+        self.assertEqual("CCBBA", to_string(lzw)[-5:])
+
+        lzw = LZW([0x41, 0x42, 0x43, 0x102, 0x44], table_size=258)
+        self.assertEqual("ABCCCD", to_string(lzw))
+
+    def test_lzw_unknown_first(self):
+        """LZWTest that a first codeword which is not yet in the table is rejected."""
+        with self.assertRaises(IndexError):
+            list(LZW([0x100]).expand())
+
+        with self.assertRaisesRegex(IndexError, "codeword 0x100 is not in the table"):
+            LZW([0x100]).decode()
+
 
 class BinaryInputTest(TestCase):
 
     def test_binary_input(self):
-        filename = r"examples/compressedfile4.z"
+        filename = r"examples/compressedfile3.z"
         bs = pathlib.Path(filename).read_bytes()
         nbits = os.stat(filename).st_size * 8
         has_last = nbits % 12 != 0
@@ -116,3 +212,54 @@ class BinaryInputTest(TestCase):
         codewords2 = [x for x in bi]
         self.assertEqual(codewords, codewords2)
 
+        codewords3 = bi.codewords()
+        self.assertEqual("H", codewords3.typecode)
+        self.assertEqual(codewords, codewords3.tolist())
+
+    def test_binary_input_even(self):
+        """A file holding an even number of codewords has no 16-bit padded element."""
+        bi = Binary12BitInput(r"examples/compressedfile1.z")
+
+        self.assertEqual("Hello, world!\n", to_string(LZW(bi)))
+
+    def test_binary_input_empty(self):
+        """An empty file holds no codewords and decodes to nothing."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "empty.z")
+            pathlib.Path(filename).write_bytes(b"")
+
+            self.assertEqual([], list(Binary12BitInput(filename)))
+            self.assertEqual([], list(LZW(Binary12BitInput(filename)).expand()))
+            self.assertEqual(b"", decode_file(filename))
+
+    def test_decode_buffer(self):
+        """Decoding the raw file contents gives the known plaintext."""
+        decoded = decode(pathlib.Path(r"examples/compressedfile3.z").read_bytes())
+
+        self.assertTrue(decoded.startswith(b"It was a bright cold day in April, "
+                                           b"and the clocks were striking thirteen. "))
+        self.assertTrue(decoded.endswith(b"He got up and moved heavily towards the door.\n"))
+
+    def test_decode_memoryview(self):
+        """Any bytes-like object decodes the same as bytes."""
+        bs = pathlib.Path(r"examples/compressedfile3.z").read_bytes()
+
+        self.assertEqual(decode(bs), decode(memoryview(bs)))
+        self.assertEqual(decode(bs), decode(bytearray(bs)))
+
+    def test_binary_input_blocks(self):
+        """Unpacking data spanning several blocks matches unpacking each part on its own."""
+        bs = pathlib.Path(r"examples/compressedfile3.z").read_bytes()
+        groups = bs[:len(bs) // 3 * 3]
+
+        codewords = lzw._unpack(groups)
+        self.assertEqual(codewords * 5, lzw._unpack(groups * 5))
+
+    def test_decode_file(self):
+        """Decoding a file by name gives its plaintext."""
+        self.assertEqual(b"Hello, world!\n", decode_file(r"examples/compressedfile1.z"))
+
+        decoded = decode_file(r"examples/compressedfile3.z")
+        self.assertTrue(decoded.startswith(b"It was a bright cold day in April, "
+                                           b"and the clocks were striking thirteen. "))
+        self.assertTrue(decoded.endswith(b"He got up and moved heavily towards the door.\n"))